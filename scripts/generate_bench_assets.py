@@ -3,6 +3,8 @@
 
 Environment / args:
     BENCH_EXPORT_DIR (optional): override output directory (default bench_artifacts)
+    BENCH_FORMATS (optional): comma-separated chart formats, e.g. "png" or "png,svg"
+        (default png,svg; SVG emission is the expensive half for line plots)
 
 Outputs (in export dir):
     fire_results.csv / .md
@@ -12,46 +14,57 @@ Outputs (in export dir):
     fire_efficiency.(png|svg)
     population_point_range.(png|svg)   # point & range query comparison
 
-Requires: matplotlib, pandas (install via pip if missing)
+Requires: matplotlib, pandas, tabulate (install via pip if missing)
 """
 from __future__ import annotations
-import csv
-import math
 import os
+import sys
 import json
-from dataclasses import dataclass
-from typing import List
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, NamedTuple
 
 try:
+    import numpy as np  # type: ignore
     import pandas as pd  # type: ignore
-    import matplotlib.pyplot as plt  # type: ignore
+    # Optional pandas extra, needed by DataFrame.to_markdown; import it here so
+    # a missing install fails with the friendly message below.
+    import tabulate  # type: ignore  # noqa: F401
+    # Headless batch script: build Figure + Agg canvas directly instead of
+    # going through pyplot, skipping the global figure manager, interactive
+    # hooks, and backend auto-detection (Qt/Tk probing) entirely.
+    from matplotlib.figure import Figure  # type: ignore
+    from matplotlib.backends.backend_agg import FigureCanvasAgg  # type: ignore
 except ImportError:
-    raise SystemExit("Please install dependencies: pip install pandas matplotlib")
+    raise SystemExit("Please install dependencies: pip install pandas matplotlib tabulate")
 
 ARTIFACT_DIR = os.environ.get("BENCH_EXPORT_DIR", "bench_artifacts")
+CHART_FORMATS = set(os.environ.get("BENCH_FORMATS", "png,svg").split(","))
 
 os.makedirs(ARTIFACT_DIR, exist_ok=True)
 
-@dataclass
-class FireResult:
+# NamedTuple rather than a dataclass: no per-instance __dict__, and attribute
+# access is a C-level tuple index.
+class FireResult(NamedTuple):
     model: str
     threads: int
     time_s: float
     speedup: float
-    efficiency: float  # 0..1
     files_per_sec: float
 
+# Efficiency (0..1) is speedup/threads; derived once on the DataFrame below
+# rather than hard-coded per row, so the two can never drift apart.
 FIRE_DATA: List[FireResult] = [
-    FireResult("Row", 1, 2.079, 1.00, 1.00, 248.2),
-    FireResult("Row", 2, 1.328, 1.57, 1.57/2, 388.4),
-    FireResult("Row", 3, 1.006, 2.07, 2.07/3, 513.2),
-    FireResult("Row", 4, 0.828, 2.51, 2.51/4, 622.9),
-    FireResult("Row", 8, 0.806, 2.58, 2.58/8, 640.5),
-    FireResult("Column", 1, 2.094, 1.00, 1.00, 246.4),
-    FireResult("Column", 2, 1.340, 1.56, 1.56/2, 385.0),
-    FireResult("Column", 3, 1.037, 2.02, 2.02/3, 497.4),
-    FireResult("Column", 4, 0.874, 2.40, 2.40/4, 590.6),
-    FireResult("Column", 8, 0.850, 2.46, 2.46/8, 606.8),
+    FireResult("Row", 1, 2.079, 1.00, 248.2),
+    FireResult("Row", 2, 1.328, 1.57, 388.4),
+    FireResult("Row", 3, 1.006, 2.07, 513.2),
+    FireResult("Row", 4, 0.828, 2.51, 622.9),
+    FireResult("Row", 8, 0.806, 2.58, 640.5),
+    FireResult("Column", 1, 2.094, 1.00, 246.4),
+    FireResult("Column", 2, 1.340, 1.56, 385.0),
+    FireResult("Column", 3, 1.037, 2.02, 497.4),
+    FireResult("Column", 4, 0.874, 2.40, 590.6),
+    FireResult("Column", 8, 0.850, 2.46, 606.8),
 ]
 
 # Population results (with parallel variants). Times are microseconds (µs).
@@ -66,121 +79,212 @@ POPULATION_ROWS = [
     {"operation": "Range (11y)", "row_serial_us": 37.558, "row_parallel_us": 22.092, "column_serial_us": 0.592, "column_parallel_us": 0.308},
 ]
 
-def _add_derived_population_metrics(rows):
-    for r in rows:
-        r["column_advantage_serial"] = (r["row_serial_us"] / r["column_serial_us"]) if r["column_serial_us"] else None
-        # Parallel advantage (avoid div-by-zero)
-        if r["column_parallel_us"]:
-            r["column_advantage_parallel"] = (r["row_parallel_us"] / r["column_parallel_us"]) if r["row_parallel_us"] else None
-        else:
-            r["column_advantage_parallel"] = None
-
-_add_derived_population_metrics(POPULATION_ROWS)
-
-# --- CSV export ---
-fire_csv_path = os.path.join(ARTIFACT_DIR, "fire_results.csv")
-with open(fire_csv_path, "w", newline="") as f:
-    w = csv.writer(f)
-    w.writerow(["model", "threads", "time_s", "speedup", "efficiency", "files_per_sec"])
-    for r in FIRE_DATA:
-        w.writerow([r.model, r.threads, f"{r.time_s:.3f}", f"{r.speedup:.2f}", f"{r.efficiency:.4f}", f"{r.files_per_sec:.1f}"])
-
-pop_csv_path = os.path.join(ARTIFACT_DIR, "population_results.csv")
-with open(pop_csv_path, "w", newline="") as f:
-    w = csv.writer(f)
-    w.writerow(["operation", "row_serial_us", "row_parallel_us", "column_serial_us", "column_parallel_us", "column_advantage_serial", "column_advantage_parallel"])
-    for row in POPULATION_ROWS:
-        w.writerow([
-            row["operation"],
-            f"{row['row_serial_us']:.3f}",
-            f"{row['row_parallel_us']:.3f}",
-            f"{row['column_serial_us']:.3f}",
-            f"{row['column_parallel_us']:.3f}",
-            f"{row['column_advantage_serial']:.2f}x",
-            f"{row['column_advantage_parallel']:.2f}x" if row['column_advantage_parallel'] is not None else "-",
-        ])
-
-# --- Markdown export ---
-fire_md_path = os.path.join(ARTIFACT_DIR, "fire_results.md")
-with open(fire_md_path, "w") as f:
-    f.write("| Model | Threads | Time (s) | Speedup | Efficiency | Files/sec |\n")
-    f.write("|-------|---------|----------|---------|------------|-----------|\n")
-    for r in FIRE_DATA:
-        f.write(f"| {r.model} | {r.threads} | {r.time_s:.3f} | {r.speedup:.2f}x | {r.efficiency*100:.1f}% | {r.files_per_sec:.1f} |\n")
-
-pop_md_path = os.path.join(ARTIFACT_DIR, "population_results.md")
-with open(pop_md_path, "w") as f:
-    f.write("| Operation | Row Serial (µs) | Row Parallel (µs) | Column Serial (µs) | Column Parallel (µs) | Col Adv Serial | Col Adv Parallel |\n")
-    f.write("|-----------|----------------:|------------------:|------------------:|--------------------:|---------------:|-----------------:|\n")
-    for row in POPULATION_ROWS:
-        f.write(
-            f"| {row['operation']} | {row['row_serial_us']:.3f} | {row['row_parallel_us']:.3f} | {row['column_serial_us']:.3f} | {row['column_parallel_us']:.3f} | {row['column_advantage_serial']:.2f}x | {row['column_advantage_parallel']:.2f}x |\n"
-        )
-
-# --- JSON bundle ---
-json_path = os.path.join(ARTIFACT_DIR, "benchmarks.json")
-with open(json_path, "w") as jf:
-    json.dump({
-        "fire": [r.__dict__ for r in FIRE_DATA],
-        "population": POPULATION_ROWS,
+# Derived metrics as vectorized column expressions instead of a per-row Python
+# loop with branchy div-by-zero guards; df_pop is the source for all emitters.
+df_pop = pd.DataFrame(POPULATION_ROWS)
+df_pop["column_advantage_serial"] = df_pop["row_serial_us"] / df_pop["column_serial_us"]
+df_pop["column_advantage_parallel"] = np.where(
+    df_pop["column_parallel_us"] > 0,
+    df_pop["row_parallel_us"] / df_pop["column_parallel_us"],
+    np.nan,
+)
+
+# Fire results as a DataFrame for the same reason: one columnar structure
+# feeding CSV, Markdown, and JSON instead of repeated Python loops.
+df_fire = pd.DataFrame(FIRE_DATA, columns=FireResult._fields)
+df_fire.insert(4, "efficiency", df_fire["speedup"] / df_fire["threads"])
+
+# --- Text emitters (CSV / Markdown / JSON) ---
+# Each emitter is a self-contained function so the lot can be dispatched to a
+# thread pool and overlap with chart rendering on the main thread.
+
+# Canonical display strings, formatted once per value. df_pop_fmt feeds both
+# the population CSV and Markdown emitters; df_fire_fmt only feeds the fire
+# Markdown table now that the fire CSV is formatted by np.savetxt. The JSON
+# bundle keeps the raw numeric columns.
+df_fire_fmt = df_fire.assign(
+    time_s=df_fire["time_s"].map("{:.3f}".format),
+    speedup=df_fire["speedup"].map("{:.2f}".format),
+    files_per_sec=df_fire["files_per_sec"].map("{:.1f}".format),
+)
+df_pop_fmt = df_pop.assign(
+    row_serial_us=df_pop["row_serial_us"].map("{:.3f}".format),
+    row_parallel_us=df_pop["row_parallel_us"].map("{:.3f}".format),
+    column_serial_us=df_pop["column_serial_us"].map("{:.3f}".format),
+    column_parallel_us=df_pop["column_parallel_us"].map("{:.3f}".format),
+    column_advantage_serial=df_pop["column_advantage_serial"].map("{:.2f}x".format),
+    column_advantage_parallel=df_pop["column_advantage_parallel"].map(
+        lambda v: "-" if np.isnan(v) else f"{v:.2f}x"
+    ),
+)
+
+def write_fire_csv():
+    # numpy.savetxt applies one precomputed row format at C level; the model
+    # column rides along as %s in the object array. Output is identical to the
+    # previous to_csv layout.
+    np.savetxt(
+        os.path.join(ARTIFACT_DIR, "fire_results.csv"),
+        df_fire.to_numpy(dtype=object),
+        fmt="%s,%d,%.3f,%.2f,%.4f,%.1f",
+        header="model,threads,time_s,speedup,efficiency,files_per_sec",
+        comments="",
+    )
+
+def write_population_csv():
+    df_pop_fmt.to_csv(os.path.join(ARTIFACT_DIR, "population_results.csv"), index=False)
+
+def write_fire_md():
+    # Render display-formatted DataFrames with to_markdown (tabulate-backed) so
+    # the table layout is not duplicated row by row next to the CSV emitters.
+    # The whole table (header, rule, rows, trailing newline) is materialized as
+    # one string and emitted with a single write(). Efficiency is shown as a
+    # percentage, so it is the one column not taken from df_fire_fmt.
+    content = pd.DataFrame({
+        "Model": df_fire_fmt["model"],
+        "Threads": df_fire_fmt["threads"],
+        "Time (s)": df_fire_fmt["time_s"],
+        "Speedup": df_fire_fmt["speedup"] + "x",
+        "Efficiency": (df_fire["efficiency"] * 100).map("{:.1f}%".format),
+        "Files/sec": df_fire_fmt["files_per_sec"],
+    }).to_markdown(index=False, disable_numparse=True) + "\n"
+    with open(os.path.join(ARTIFACT_DIR, "fire_results.md"), "w", buffering=1<<20) as f:
+        f.write(content)
+
+def write_population_md():
+    content = df_pop_fmt.rename(columns={
+        "operation": "Operation",
+        "row_serial_us": "Row Serial (µs)",
+        "row_parallel_us": "Row Parallel (µs)",
+        "column_serial_us": "Column Serial (µs)",
+        "column_parallel_us": "Column Parallel (µs)",
+        "column_advantage_serial": "Col Adv Serial",
+        "column_advantage_parallel": "Col Adv Parallel",
+    }).to_markdown(
+        index=False,
+        disable_numparse=True,
+        # Match the baseline table: every column after Operation right-aligned.
+        colalign=("left",) + ("right",) * 6,
+    ) + "\n"
+    with open(os.path.join(ARTIFACT_DIR, "population_results.md"), "w", buffering=1<<20) as f:
+        f.write(content)
+
+def write_json():
+    # json.dump with indent= issues one write() per token; serialize to a
+    # string first and write it in one call.
+    json_payload = json.dumps({
+        "fire": df_fire.to_dict(orient="records"),
+        "population": df_pop.to_dict(orient="records"),
         "metadata": {
             "fire_dataset": {"files": 516, "measurements": 1167525, "sites": 1398},
             "population_dataset": {"countries": 266, "years": 65},
             "generated_with": "generate_bench_assets.py"
         }
-    }, jf, indent=2)
+    }, indent=2)
+    with open(os.path.join(ARTIFACT_DIR, "benchmarks.json"), "w", buffering=1<<20) as jf:
+        jf.write(json_payload)
+
+TEXT_EMITTERS = (write_fire_csv, write_population_csv, write_fire_md, write_population_md, write_json)
 
 # --- Charts ---
-# Fire speedup bar chart
-import itertools
-
-row_threads = [r.threads for r in FIRE_DATA if r.model == "Row"]
-row_speedup = [r.speedup for r in FIRE_DATA if r.model == "Row"]
-col_speedup = [r.speedup for r in FIRE_DATA if r.model == "Column"]
-
-fig, ax = plt.subplots(figsize=(6,4))
-ax.plot(row_threads, row_speedup, marker='o', label='Row')
-ax.plot(row_threads, col_speedup, marker='s', label='Column')
-ax.set_xlabel('Threads')
-ax.set_ylabel('Speedup (vs 1 thread)')
-ax.set_title('Fire Data Speedup')
-ax.grid(alpha=0.25)
-ax.legend()
-fig.tight_layout()
-fig.savefig(os.path.join(ARTIFACT_DIR, 'fire_speedup.png'), dpi=160)
-fig.savefig(os.path.join(ARTIFACT_DIR, 'fire_speedup.svg'))
-plt.close(fig)
-
-# Fire efficiency chart
-row_eff = [r.efficiency*100 for r in FIRE_DATA if r.model == "Row"]
-col_eff = [r.efficiency*100 for r in FIRE_DATA if r.model == "Column"]
-fig, ax = plt.subplots(figsize=(6,4))
-ax.plot(row_threads, row_eff, marker='o', label='Row')
-ax.plot(row_threads, col_eff, marker='s', label='Column')
-ax.set_xlabel('Threads')
-ax.set_ylabel('Efficiency (%)')
-ax.set_title('Fire Data Parallel Efficiency')
-ax.grid(alpha=0.25)
-ax.legend()
-fig.tight_layout()
-fig.savefig(os.path.join(ARTIFACT_DIR, 'fire_efficiency.png'), dpi=160)
-fig.savefig(os.path.join(ARTIFACT_DIR, 'fire_efficiency.svg'))
-plt.close(fig)
-
-# Population point vs range query (serial) chart
-point = next(r for r in POPULATION_ROWS if r['operation'] == 'Point Query')
-range_op = next(r for r in POPULATION_ROWS if r['operation'].startswith('Range'))
-fig, ax = plt.subplots(figsize=(6,4))
-labels = ['Point Serial', 'Point Parallel', 'Range Serial', 'Range Parallel']
-values = [point['column_serial_us'], point['column_parallel_us'], range_op['column_serial_us'], range_op['column_parallel_us']]
-ax.bar(labels, values, color=['#4c72b0','#55a868','#4c72b0','#55a868'])
-ax.set_ylabel('Time (µs)')
-ax.set_title('Population Analytical Latency (Column Model)')
-for i,v in enumerate(values):
-    ax.text(i, v*1.02, f"{v:.3f}", ha='center', fontsize=8)
-fig.tight_layout()
-fig.savefig(os.path.join(ARTIFACT_DIR, 'population_point_range.png'), dpi=160)
-fig.savefig(os.path.join(ARTIFACT_DIR, 'population_point_range.svg'))
-plt.close(fig)
+# Partition the fire results by model once (one C-level mask per model) and
+# pull SoA (structure-of-arrays) NumPy columns from the partitions, instead of
+# re-filtering FIRE_DATA per series; ndarrays also take matplotlib's fast
+# input path.
+_fire_row = df_fire[df_fire["model"] == "Row"]
+_fire_col = df_fire[df_fire["model"] == "Column"]
+row_threads = _fire_row["threads"].to_numpy()
+row_speedup = _fire_row["speedup"].to_numpy()
+col_speedup = _fire_col["speedup"].to_numpy()
+row_eff = _fire_row["efficiency"].to_numpy() * 100
+col_eff = _fire_col["efficiency"].to_numpy() * 100
+
+# Per-worker Figure/Axes: built once by the pool initializer and reused via
+# ax.cla() between charts, so the Agg renderer and font caches survive across
+# renders instead of being torn down and rebuilt per chart. (Figure objects
+# cannot be shared across processes, hence one per worker.)
+_worker_fig = None
+_worker_ax = None
+
+def _init_chart_worker():
+    global _worker_fig, _worker_ax
+    _worker_fig = Figure(figsize=(6,4))
+    FigureCanvasAgg(_worker_fig)
+    _worker_ax = _worker_fig.add_subplot(111)
+
+def render(plot_fn, name):
+    # Runs in a chart-pool worker process (or inline if called directly).
+    if _worker_fig is None:
+        _init_chart_worker()
+    fig, ax = _worker_fig, _worker_ax
+    ax.cla()
+    plot_fn(ax)
+    fig.tight_layout()
+    if "png" in CHART_FORMATS:
+        # Low zlib level: PNG compression dominates savefig CPU for these small
+        # charts, and the size difference is marginal.
+        fig.savefig(os.path.join(ARTIFACT_DIR, f"{name}.png"), dpi=160,
+                    pil_kwargs={"compress_level": 1})
+    if "svg" in CHART_FORMATS:
+        fig.savefig(os.path.join(ARTIFACT_DIR, f"{name}.svg"))
+
+def plot_fire_speedup(ax):
+    ax.plot(row_threads, row_speedup, marker='o', label='Row')
+    ax.plot(row_threads, col_speedup, marker='s', label='Column')
+    ax.set_xlabel('Threads')
+    ax.set_ylabel('Speedup (vs 1 thread)')
+    ax.set_title('Fire Data Speedup')
+    ax.grid(alpha=0.25)
+    ax.legend()
+
+def plot_fire_efficiency(ax):
+    ax.plot(row_threads, row_eff, marker='o', label='Row')
+    ax.plot(row_threads, col_eff, marker='s', label='Column')
+    ax.set_xlabel('Threads')
+    ax.set_ylabel('Efficiency (%)')
+    ax.set_title('Fire Data Parallel Efficiency')
+    ax.grid(alpha=0.25)
+    ax.legend()
+
+def plot_population_point_range(ax):
+    point = next(r for r in POPULATION_ROWS if r['operation'] == 'Point Query')
+    range_op = next(r for r in POPULATION_ROWS if r['operation'].startswith('Range'))
+    labels = ['Point Serial', 'Point Parallel', 'Range Serial', 'Range Parallel']
+    values = [point['column_serial_us'], point['column_parallel_us'], range_op['column_serial_us'], range_op['column_parallel_us']]
+    ax.bar(labels, values, color=['#4c72b0','#55a868','#4c72b0','#55a868'])
+    ax.set_ylabel('Time (µs)')
+    ax.set_title('Population Analytical Latency (Column Model)')
+    for i,v in enumerate(values):
+        ax.text(i, v*1.02, f"{v:.3f}", ha='center', fontsize=8)
+
+CHART_JOBS = [
+    (plot_fire_speedup, 'fire_speedup'),
+    (plot_fire_efficiency, 'fire_efficiency'),
+    (plot_population_point_range, 'population_point_range'),
+]
+
+# The charts are independent, so rasterize them on separate cores where a
+# fork-based pool is safe: Agg rendering mostly holds the GIL, which threads
+# would serialize but processes do not. That means Linux only — Windows has no
+# fork context, CPython documents fork-without-exec as crash-prone on macOS,
+# and spawn cannot be used because this guardless script would be re-executed
+# in every worker. Elsewhere the charts render inline on the main thread. In
+# both cases the text emitters overlap on worker threads; the pool is forked
+# before the emitter threads start (forking with live threads is unsafe).
+if sys.platform.startswith("linux"):
+    _chart_ctx = multiprocessing.get_context("fork")
+    with _chart_ctx.Pool(processes=len(CHART_JOBS), initializer=_init_chart_worker) as chart_pool:
+        async_charts = chart_pool.starmap_async(render, CHART_JOBS)
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            text_futures = [pool.submit(emit) for emit in TEXT_EMITTERS]
+            for fut in text_futures:
+                fut.result()
+        async_charts.get()
+else:
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        text_futures = [pool.submit(emit) for emit in TEXT_EMITTERS]
+        for plot_fn, name in CHART_JOBS:
+            render(plot_fn, name)
+        for fut in text_futures:
+            fut.result()
 
 print("Artifacts written to", ARTIFACT_DIR)